@@ -1,10 +1,11 @@
 from dataclasses import dataclass, field
-from typing import Callable
+from functools import lru_cache
+from typing import Callable, Iterable
 
 
 # ================= VALUE OBJECT ================= #
 
-@dataclass
+@dataclass(slots=True)
 class RuleValue:
     number: int
     tags: list[str] = field(default_factory=list)
@@ -21,22 +22,66 @@ class RuleValue:
     def render(self) -> str:
         if self.banned:
             raise Exception(f"Game Over ❌ — {self.number} is banned")
-        return " ".join(self.tags) if self.tags else str(self.number)
+        tags = self.tags
+        if len(tags) == 1:
+            # The dominant case — one rule, one tag — needs no join.
+            return tags[0]
+        return " ".join(tags) if tags else str(self.number)
 
 
 # ================= RULE METADATA ================= #
 
-@dataclass
+# Integer codes for rule kinds, used by the struct-of-arrays hot path.
+KIND_SWAP      = 0
+KIND_REPLACE   = 1
+KIND_BAN       = 2
+KIND_DIVISIBLE = 3
+KIND_ODD       = 4
+KIND_EVEN      = 5
+
+_KIND_CODES = {
+    'swap': KIND_SWAP, 'replace': KIND_REPLACE, 'ban': KIND_BAN,
+    'divisible': KIND_DIVISIBLE, 'odd': KIND_ODD, 'even': KIND_EVEN,
+}
+
+# Text payloads are interned here so rule parameters stay plain ints;
+# id 0 is reserved for "no text".
+_TEXTS: list[str] = [""]
+_TEXT_IDS: dict[str, int] = {"": 0}
+
+def _text_id(text: str) -> int:
+    tid = _TEXT_IDS.get(text)
+    if tid is None:
+        tid = _TEXT_IDS[text] = len(_TEXTS)
+        _TEXTS.append(text)
+    return tid
+
+
+@dataclass(slots=True)
 class RuleEntry:
     """A rule function paired with human-readable metadata for conflict checking and display."""
     kind: str            # 'swap', 'replace', 'ban', 'divisible', 'odd', 'even'
-    params: dict         # e.g. {'a': 6, 'b': 9} or {'num': 4} or {'divisor': 3, 'text': 'Fizz'}
+    a: int               # first int param: swap a / replace num / ban num / divisor
+    b: int               # second int param: swap b (0 for every other kind)
+    text_id: int         # index into _TEXTS (0 = no text payload)
     description: str     # human-readable summary
     fn: Callable         # the actual rule function
 
     def __str__(self):
         return self.description
 
+    @property
+    def text(self) -> str:
+        return _TEXTS[self.text_id]
+
+    def key(self) -> tuple[str, int, int, int]:
+        """Identity tuple used for duplicate detection — cheap int equality."""
+        return (self.kind, self.a, self.b, self.text_id)
+
+    def encode(self) -> tuple[int, int, int, str]:
+        """Flatten to (kind_code, p0, p1, text) for the struct-of-arrays mirror."""
+        return _KIND_CODES[self.kind], self.a, self.b, _TEXTS[self.text_id]
+
 
 # ================= CONFLICT CHECKER ================= #
 
@@ -48,34 +93,49 @@ class ConflictChecker:
       1. Duplicate rule already exists (same kind + params).
       2. Rule targets a number that is already banned.
       3. Swap involves a number that is already banned.
-    """
 
-    def __init__(self, active_rules: list[RuleEntry]):
-        self.active = active_rules
+    The banned-number set and a (kind, params) index are built once and kept
+    in sync via add()/remove(), so each check is O(1) instead of rescanning
+    every active rule. Callers may hand in their own banned set to share it;
+    it is then updated in place by add()/remove().
+    """
 
-    def banned_numbers(self) -> set[int]:
-        return {r.params['num'] for r in self.active if r.kind == 'ban'}
+    def __init__(self, active_rules: Iterable[RuleEntry],
+                 banned_numbers: set[int] | None = None):
+        active_rules = list(active_rules)
+        if banned_numbers is None:
+            banned_numbers = {r.a for r in active_rules if r.kind == 'ban'}
+        self._banned = banned_numbers
+        self._index = {r.key(): r for r in active_rules}
+
+    def add(self, entry: RuleEntry):
+        """Record a rule that passed check() and was added to the game."""
+        self._index[entry.key()] = entry
+        if entry.kind == 'ban':
+            self._banned.add(entry.a)
+
+    def remove(self, entry: RuleEntry):
+        """Forget a rule that was removed from the game."""
+        self._index.pop(entry.key(), None)
+        if entry.kind == 'ban':
+            self._banned.discard(entry.a)
 
     def check(self, proposed: RuleEntry) -> str | None:
         """Return a conflict message, or None if the rule is clean."""
-        banned = self.banned_numbers()
-
         # 1. Duplicate
-        for existing in self.active:
-            if existing.kind == proposed.kind and existing.params == proposed.params:
-                return f"An identical rule already exists → [{existing}]"
+        existing = self._index.get(proposed.key())
+        if existing is not None:
+            return f"An identical rule already exists → [{existing}]"
 
         # 2. Rule targets a banned number
         if proposed.kind == 'replace':
-            n = proposed.params['num']
-            if n in banned:
-                return f"{n} is already banned — a replace rule for it would never fire"
+            if proposed.a in self._banned:
+                return f"{proposed.a} is already banned — a replace rule for it would never fire"
 
         # 3. Swap involves a banned number
         if proposed.kind == 'swap':
-            for side in ('a', 'b'):
-                n = proposed.params[side]
-                if n in banned:
+            for n in (proposed.a, proposed.b):
+                if n in self._banned:
                     return f"{n} is already banned — it cannot participate in a swap"
 
         return None
@@ -84,26 +144,38 @@ class ConflictChecker:
 # ================= RULE FACTORY ================= #
 
 class Rules:
+    """Factories for RuleEntry instances.
+
+    Entries are immutable once built, so each factory is memoized: proposing
+    the same rule twice (common when retrying after a conflict) returns the
+    cached entry instead of constructing a fresh closure.
+    """
 
     @staticmethod
+    @lru_cache(maxsize=256)
     def swap(a: int, b: int) -> RuleEntry:
         def fn(rv: RuleValue) -> RuleValue:
-            if rv.number == a:   rv.number = b
-            elif rv.number == b: rv.number = a
+            # a ^ b ^ n maps a -> b and b -> a without branching on which
+            # side matched.
+            if rv.number == a or rv.number == b:
+                rv.number = a ^ b ^ rv.number
             return rv
-        return RuleEntry('swap', {'a': a, 'b': b}, f"Swap {a} ↔ {b}", fn)
+        return RuleEntry('swap', a, b, 0, f"Swap {a} ↔ {b}", fn)
 
     @staticmethod
+    @lru_cache(maxsize=256)
     def replace(num: int, text: str) -> RuleEntry:
         fn = lambda rv: rv.tag(text) if rv.number == num else rv
-        return RuleEntry('replace', {'num': num, 'text': text}, f"Replace {num} → '{text}'", fn)
+        return RuleEntry('replace', num, 0, _text_id(text), f"Replace {num} → '{text}'", fn)
 
     @staticmethod
+    @lru_cache(maxsize=256)
     def ban(num: int) -> RuleEntry:
         fn = lambda rv: rv.ban() if rv.number == num else rv
-        return RuleEntry('ban', {'num': num}, f"Ban {num}", fn)
+        return RuleEntry('ban', num, 0, 0, f"Ban {num}", fn)
 
     @staticmethod
+    @lru_cache(maxsize=256)
     def divisible(divisor: int, text: str) -> RuleEntry:
         if divisor == 0:
             raise ValueError("Divisor cannot be zero.")
@@ -115,40 +187,46 @@ class Rules:
 
         return RuleEntry(
             'divisible',
-            {'divisor': divisor, 'text': text},
+            divisor, 0, _text_id(text),
             f"Divisible by {divisor} → '{text}'",
             fn
         )
 
     @staticmethod
+    @lru_cache(maxsize=256)
     def odd(text: str) -> RuleEntry:
-        fn = lambda rv: rv.tag(text) if rv.number % 2 != 0 else rv
-        return RuleEntry('odd', {'text': text}, f"Odd → '{text}'", fn)
+        fn = lambda rv: rv.tag(text) if rv.number & 1 else rv
+        return RuleEntry('odd', 0, 0, _text_id(text), f"Odd → '{text}'", fn)
 
     @staticmethod
+    @lru_cache(maxsize=256)
     def even(text: str) -> RuleEntry:
-        fn = lambda rv: rv.tag(text) if rv.number % 2 == 0 else rv
-        return RuleEntry('even', {'text': text}, f"Even → '{text}'", fn)
+        fn = lambda rv: rv.tag(text) if rv.number & 1 == 0 else rv
+        return RuleEntry('even', 0, 0, _text_id(text), f"Even → '{text}'", fn)
 
 
 # ================= PREDEFINED RULES ================= #
 
-PREDEFINED = {
-    1: ("Swap 6 ↔ 9",            lambda: Rules.swap(6, 9)),
-    2: ("Replace 1 → 'ewww 1'",  lambda: Rules.replace(1, "ewww 1")),
-    3: ("Ban 4",                  lambda: Rules.ban(4)),
-    4: ("Divisible by 3 → Fizz", lambda: Rules.divisible(3, "Fizz")),
-    5: ("Odd → 'Odd'",           lambda: Rules.odd("Odd")),
-}
-
-PATTERNS = {
-    1: ("Swap A B",          lambda: Rules.swap(int(input("  A: ")), int(input("  B: ")))),
-    2: ("Replace N TEXT",    lambda: Rules.replace(int(input("  N: ")), input("  TEXT: "))),
-    3: ("Ban N",             lambda: Rules.ban(int(input("  N: ")))),
-    4: ("Divisible D TEXT",  lambda: Rules.divisible(int(input("  D: ")), input("  TEXT: "))),
-    5: ("Odd TEXT",          lambda: Rules.odd(input("  TEXT: "))),
-    6: ("Even TEXT",         lambda: Rules.even(input("  TEXT: "))),
-}
+# Menu choices are dense 1-based ints, so a tuple (slot 0 unused) gives
+# direct indexing without dict hashing.
+PREDEFINED = (
+    None,
+    ("Swap 6 ↔ 9",            lambda: Rules.swap(6, 9)),
+    ("Replace 1 → 'ewww 1'",  lambda: Rules.replace(1, "ewww 1")),
+    ("Ban 4",                  lambda: Rules.ban(4)),
+    ("Divisible by 3 → Fizz", lambda: Rules.divisible(3, "Fizz")),
+    ("Odd → 'Odd'",           lambda: Rules.odd("Odd")),
+)
+
+PATTERNS = (
+    None,
+    ("Swap A B",          lambda: Rules.swap(int(input("  A: ")), int(input("  B: ")))),
+    ("Replace N TEXT",    lambda: Rules.replace(int(input("  N: ")), input("  TEXT: "))),
+    ("Ban N",             lambda: Rules.ban(int(input("  N: ")))),
+    ("Divisible D TEXT",  lambda: Rules.divisible(int(input("  D: ")), input("  TEXT: "))),
+    ("Odd TEXT",          lambda: Rules.odd(input("  TEXT: "))),
+    ("Even TEXT",         lambda: Rules.even(input("  TEXT: "))),
+)
 
 
 # ================= HELPERS ================= #
@@ -173,13 +251,57 @@ def prompt_range() -> tuple[int, int]:
         return start, end
 
 
+# ================= EXPECTED-VALUE KERNEL ================= #
+
+def expected_token(num: int, kinds: list[int], p0s: list[int], p1s: list[int],
+                   texts: list[str], winner: list[int],
+                   banned_numbers: set[int], next_free: list[int],
+                   start: int) -> str:
+    """Map a number to the token the player must enter.
+
+    Pure function of the struct-of-arrays mirror and the precomputed
+    per-iteration structures — no I/O and no game state. The winning rule's
+    behaviour is inlined per kind, so no RuleValue is built and no rule
+    closure is called on this path; RuleEntry.fn remains the extension
+    point for rules the inline dispatch does not know about.
+    """
+    if num in banned_numbers:
+        return str(next_free[num + 1 - start])
+
+    ri = winner[num - start]
+    if ri < 0:
+        return str(num)
+    if kinds[ri] == KIND_SWAP:
+        return str(p0s[ri] ^ p1s[ri] ^ num)
+    # replace / divisible / odd / even all emit their text payload
+    # (ban rules never enter the winner table).
+    return texts[ri]
+
+
 # ================= GAME ================= #
 
 class RuleGame:
     def __init__(self):
-        self.active_rules: list[RuleEntry] = []
+        # Rules keyed by a stable id (insertion-ordered), with a secondary
+        # key -> id index so duplicate lookups and removals never scan.
+        self.active_rules: dict[int, RuleEntry] = {}
+        self._by_key: dict[tuple, int] = {}
+        self._next_id = 0
+        self._banned_numbers: set[int] = set()
+        self.checker = ConflictChecker(self.active_rules.values(), self._banned_numbers)
+        # Struct-of-arrays mirror of active_rules (same order): the hot path
+        # in run_iteration reads these flat int/str lists and never touches
+        # the RuleEntry objects, which remain for display and conflicts.
+        self._rule_kinds: list[int] = []
+        self._rule_p0:    list[int] = []
+        self._rule_p1:    list[int] = []
+        self._rule_texts: list[str] = []
         self.range_start = 1
         self.range_end   = 10
+        # Warm the memoized factories behind the predefined menu up front so
+        # the first interactive add is a cache hit, not a build.
+        for _, builder in PREDEFINED[1:]:
+            builder()
 
     # ---- display ----
 
@@ -187,18 +309,26 @@ class RuleGame:
         if not self.active_rules:
             print("    (no rules active)")
         else:
-            for i, r in enumerate(self.active_rules, 1):
+            for i, r in enumerate(self.active_rules.values(), 1):
                 print(f"    {i:>2}. {r}")
 
     # ---- conflict-aware add ----
 
     def try_add(self, entry: RuleEntry) -> bool:
-        checker = ConflictChecker(self.active_rules)
-        conflict = checker.check(entry)
+        conflict = self.checker.check(entry)
         if conflict:
             print(f"\n  ⚠  Conflict detected: {conflict}")
             return False
-        self.active_rules.append(entry)
+        rid = self._next_id
+        self._next_id += 1
+        self.active_rules[rid] = entry
+        self._by_key[entry.key()] = rid
+        self.checker.add(entry)
+        kind, p0, p1, text = entry.encode()
+        self._rule_kinds.append(kind)
+        self._rule_p0.append(p0)
+        self._rule_p1.append(p1)
+        self._rule_texts.append(text)
         print(f"  ✓ Rule added: [{entry}]")
         return True
 
@@ -206,11 +336,11 @@ class RuleGame:
 
     def add_predefined_rule(self):
         print("\n  Predefined Rules:")
-        for k, (desc, _) in PREDEFINED.items():
+        for k, (desc, _) in enumerate(PREDEFINED[1:], 1):
             print(f"    {k}. {desc}")
 
         choice = prompt_int("  Select: ")
-        if choice not in PREDEFINED:
+        if choice is None or not (1 <= choice < len(PREDEFINED)):
             print("  ✗ Invalid selection.")
             return
 
@@ -219,11 +349,11 @@ class RuleGame:
 
     def add_custom_rule(self):
         print("\n  Rule Patterns:")
-        for k, (desc, _) in PATTERNS.items():
+        for k, (desc, _) in enumerate(PATTERNS[1:], 1):
             print(f"    {k}. {desc}")
 
         choice = prompt_int("  Select pattern: ")
-        if choice not in PATTERNS:
+        if choice is None or not (1 <= choice < len(PATTERNS)):
             print("  ✗ Invalid pattern.")
             return
 
@@ -254,7 +384,16 @@ class RuleGame:
         if choice is None or not (1 <= choice <= len(self.active_rules)):
             print("  ✗ Invalid number.")
             return
-        removed = self.active_rules.pop(choice - 1)
+        # The displayed ordinal is the rule's position in insertion order,
+        # which also matches its row in the struct-of-arrays mirror.
+        rid = list(self.active_rules)[choice - 1]
+        removed = self.active_rules.pop(rid)
+        del self._by_key[removed.key()]
+        self.checker.remove(removed)
+        del self._rule_kinds[choice - 1]
+        del self._rule_p0[choice - 1]
+        del self._rule_p1[choice - 1]
+        del self._rule_texts[choice - 1]
         print(f"  ✓ Removed: [{removed}]")
 
     def change_range(self):
@@ -269,53 +408,70 @@ class RuleGame:
             print(f"\n  Range {self.range_start}–{self.range_end} ({count} numbers) | "
                   f"Rules active: {len(self.active_rules)}")
 
-            # Build a map of number -> applicable rule (latest rule wins on conflict)
-            rule_map: dict[int, RuleEntry] = {}
-            banned_numbers: set[int] = set()
-
-            for rule in self.active_rules:
-                if rule.kind == 'ban':
-                    banned_numbers.add(rule.params['num'])
-                else:
-                    # For non-ban rules, apply to all numbers they target
-                    if rule.kind == 'swap':
-                        # Swap applies to both numbers in the swap
-                        rule_map[rule.params['a']] = rule
-                        rule_map[rule.params['b']] = rule
-                    elif rule.kind == 'replace':
-                        rule_map[rule.params['num']] = rule
-                    else:
-                        # For divisible, odd, even: apply to all numbers in range
-                        for n in range(self.range_start, self.range_end + 1):
-                            if rule.kind == 'divisible':
-                                if n % rule.params['divisor'] == 0:
-                                    rule_map[n] = rule
-                            elif rule.kind == 'odd':
-                                if n % 2 != 0:
-                                    rule_map[n] = rule
-                            elif rule.kind == 'even':
-                                if n % 2 == 0:
-                                    rule_map[n] = rule
-
-            for num in range(self.range_start, self.range_end + 1):
-                # Compute expected result based on latest applicable rule
-                rv = RuleValue(number=num)
-
-                # If there's a rule for this number, apply only that rule
-                if num in rule_map:
-                    rv = rule_map[num].fn(rv)
-
-                expected = rv.render()
-
-                # If the number itself is banned, replace expected with next non-banned number
-                if num in banned_numbers:
-                    next_num = num + 1
-                    while next_num in banned_numbers:
-                        next_num += 1
-                    expected = str(next_num)
+            start = self.range_start
+            end   = self.range_end
+            banned_numbers = self._banned_numbers
+
+            # Successor table for banned numbers: next_free[n - start] is the
+            # first non-banned number >= n, filled by a single reverse sweep
+            # so dense runs of bans never trigger a per-number walk.
+            limit = end + 1
+            while limit in banned_numbers:
+                limit += 1
+            next_free = [0] * (limit - start + 1)
+            next_free[limit - start] = limit
+            for n in range(limit - 1, start - 1, -1):
+                next_free[n - start] = next_free[n - start + 1] if n in banned_numbers else n
+
+            # One dense winner table over the whole range: every rule writes
+            # the offsets it covers in add order, so the last write at an
+            # offset is the latest applicable rule. Sequential list stores —
+            # no hashing, no per-number index comparison.
+            kinds, p0s, p1s = self._rule_kinds, self._rule_p0, self._rule_p1
+            texts = self._rule_texts
+            winner = [-1] * count
+            for i, kind in enumerate(kinds):
+                # Dispatch on the kind once per rule rather than re-testing
+                # it for every number in the range.
+                if kind == KIND_BAN:
+                    pass  # already tracked in self._banned_numbers
+                elif kind == KIND_SWAP:
+                    for n in (p0s[i], p1s[i]):
+                        if start <= n <= end:
+                            winner[n - start] = i
+                elif kind == KIND_REPLACE:
+                    n = p0s[i]
+                    if start <= n <= end:
+                        winner[n - start] = i
+                elif kind == KIND_DIVISIBLE:
+                    # Step straight through the multiples instead of testing
+                    # every number; divisibility ignores the divisor's sign.
+                    step = abs(p0s[i])
+                    first = -(start // -step) * step  # first multiple >= start
+                    for n in range(first, end + 1, step):
+                        winner[n - start] = i
+                elif kind == KIND_ODD:
+                    for n in range(start | 1, end + 1, 2):
+                        winner[n - start] = i
+                else:  # KIND_EVEN
+                    for n in range(start + (start & 1), end + 1, 2):
+                        winner[n - start] = i
+
+            # The ruleset is fixed for the whole iteration, so every expected
+            # token can be computed before the first prompt; the input loop
+            # is then just prompt-and-compare.
+            expected_list = [
+                expected_token(num, kinds, p0s, p1s, texts, winner,
+                               banned_numbers, next_free, start)
+                for num in range(start, end + 1)
+            ]
+
+            prompt = "  {}: Your move? ".format
+            for num in range(start, end + 1):
+                expected = expected_list[num - start]
 
                 # Ask the player for their move
-                player_input = input(f"  {num}: Your move? ").strip()
+                player_input = input(prompt(num)).strip()
 
                 if player_input != expected:
                     print(f"\n  ✗ Incorrect — expected: {expected!r}. Game Over.")